@@ -15,11 +15,17 @@ import sys
 import time
 from typing import List, Tuple
 import numpy as np
+import json
 import json5
 import argparse
 
 from models import PoV
-from async_cb import AsyncCBThreadedSolution, CBProcessingPool
+from async_cb import (
+    AsyncCBThreadedSolution,
+    CBProcessingPool,
+    draw_preview_corners,
+    find_accurate_corners,
+)
 
 # TODO: to get rid of separate .def and .calib and write the calibration back to the original file, manage somehow to keep the original formatting and comments
 # TODO: rewrite to threads to be in style sync with the capture/process
@@ -76,6 +82,12 @@ async def main():
         default=4,
         help="Number of workers to process frames (per camera)",
     )
+    parser.add_argument(
+        "--detect_every",
+        type=int,
+        default=3,
+        help="Detect the pattern for the preview on every n-th frame only",
+    )
 
     args = parser.parse_args()
     input_file_path = args.ifile
@@ -93,6 +105,10 @@ async def main():
         print("Error: Invalid chessboard_size format. Use 'colsxrows', e.g., '9x6'.")
         sys.exit(1)
 
+    if args.detect_every < 1:
+        print("Error: detect_every must be a positive integer", file=sys.stderr)
+        sys.exit(1)
+
     square_size = args.square_size
 
     # Load camera configurations from the JSON file
@@ -121,6 +137,9 @@ async def main():
         cap.set(cv2.CAP_PROP_FRAME_HEIGHT, size[1])
         cap.set(cv2.CAP_PROP_FPS, camera_conf["fps"])
 
+        # Keep only the latest frame in the driver queue, stale frames only add latency
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
         # Disable autofocus
         autofocus_supported = cap.get(cv2.CAP_PROP_AUTOFOCUS) != -1
         if autofocus_supported:
@@ -146,7 +165,7 @@ async def main():
                 cap=cap,
                 processor=CBProcessingPool(
                     [
-                        AsyncCBThreadedSolution(chessboard_size)
+                        AsyncCBThreadedSolution(chessboard_size, desired_window_size)
                         for _ in range(args.division)
                     ],
                 ),
@@ -194,17 +213,29 @@ async def main():
 
     async def feeding_loop():
         nonlocal shots_count
+        frame_counter = 0
         while True:
-            tasks = []
+            # Skip preview detection on some frames, last detected corners are shown meanwhile
+            detect = frame_counter % args.detect_every == 0
+            frame_counter += 1
+
+            # Grab on all the cameras back to back for the frames to be close in time,
+            # then decode them concurrently
             for pov in povs:
+                pov.cap.grab()
+            reads = await asyncio.gather(
+                *[asyncio.to_thread(pov.cap.retrieve) for pov in povs]
+            )
+
+            tasks = []
+            for pov, (ret, frame) in zip(povs, reads):
                 idx = pov.cam_id
-                ret, frame = pov.cap.read()
 
                 if not ret:
                     print(f"Error: Could not read from camera {idx}", file=sys.stderr)
                     sys.exit(1)
 
-                tasks.append(pov.processor.send(cv2.flip(frame, 1)))
+                tasks.append(pov.processor.send((cv2.flip(frame, 1), detect)))
 
             await asyncio.gather(*tasks)
 
@@ -220,9 +251,26 @@ async def main():
                     print(f"+- Cameras missing pattern: {sorted(missing_cameras)}")
                     continue
 
+                # Detect precise corners for the shot
+                shot = await asyncio.gather(
+                    *[
+                        asyncio.to_thread(
+                            find_accurate_corners, pov.frame, chessboard_size
+                        )
+                        for pov in povs
+                    ]
+                )
+                missing_cameras = [
+                    pov.cam_id for pov, corners in zip(povs, shot) if corners is None
+                ]
+                if missing_cameras:
+                    print("Not all cameras have precisely detected the pattern.")
+                    print(f"+- Cameras missing pattern: {sorted(missing_cameras)}")
+                    continue
+
                 # Collect detected corners
-                for pov in povs:
-                    pov.shots.append(pov.corners)
+                for pov, corners in zip(povs, shot):
+                    pov.shots.append(corners)
                 shots_count += 1
 
                 # Print how many shots remains
@@ -259,20 +307,21 @@ async def main():
             )  # any channel has non empty results -> need to process them
         ):
             # NOTE: it will hang freeing if channels got not equal amounts of .send calls
-            results: List[Tuple[np.ndarray, cv2.typing.MatLike]] = await asyncio.gather(
-                *[pov.processor.results.get() for pov in povs]
-            )
+            results: List[
+                Tuple[np.ndarray | None, cv2.typing.MatLike, cv2.typing.MatLike, bool]
+            ] = await asyncio.gather(*[pov.processor.results.get() for pov in povs])
 
-            # Display and detect corners
-            for pov, (res, frame) in zip(povs, results):
+            # Display detected corners
+            for pov, (res, frame, resized_frame, detected) in zip(povs, results):
                 idx = pov.cam_id
                 pov.frame = frame
-                pov.corners = res
 
-                # Resize the frame before displaying
-                resized_frame = cv2.resize(
-                    frame, desired_window_size, interpolation=cv2.INTER_AREA
-                )
+                if detected:
+                    pov.corners = res
+                elif pov.corners is not None:
+                    draw_preview_corners(
+                        resized_frame, frame.shape, chessboard_size, pov.corners
+                    )
 
                 # Add FPS to the frame
                 cv2.putText(
@@ -319,6 +368,7 @@ async def main():
         -1, 2
     )
     objp *= square_size
+    objpoints = [objp] * shots_count
 
     # Perform intrinsic calibrations
     for pov in povs:
@@ -329,7 +379,7 @@ async def main():
         print(f"Performing intrinsic calibration for camera {idx}...")
         assert pov.frame is not None
         ret, mtx, dist_coeffs, _, _ = cv2.calibrateCamera(
-            [objp for _ in range(shots_count)],
+            objpoints,
             pov.shots,
             pov.frame.shape[1::-1],
             np.zeros((3, 3)),
@@ -370,8 +420,6 @@ async def main():
     }
 
     # Prepare shared data before transoformation compute
-    objpoints = [objp for _ in range(shots_count)]
-
     ref_pov = next(pov for pov in povs if pov.cam_id == reference_idx)
 
     imgpoints1 = ref_pov.shots
@@ -423,9 +471,9 @@ async def main():
 
         print(f"Computed transformation from camera {reference_idx} to camera {idx}.")
 
-    # Save calibrations
+    # Save calibrations (strict json is still valid json5 but is much faster to load)
     with open(output_file_path, "w") as f:
-        json5.dump(cameras_confs, f, indent=4)
+        json.dump(cameras_confs, f, indent=4)
     print("\nCalibration file is written with intrinsic and extrinsic parameters.")
 
 
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 import asyncio
+from functools import lru_cache
 import threading
 from typing import List
 
@@ -88,33 +89,101 @@ class _ThreadedAsyncCB(AsyncCB):
         return self.res
 
 
+@lru_cache
+def _transposed_corners_order(chessboard_size):
+    cols, rows = chessboard_size
+    return np.arange(cols * rows).reshape(cols, rows).T.reshape(-1)
+
+
+def find_accurate_corners(frame, chessboard_size):
+    """
+    Slow but precise chessboard detection, the corners are used for calibration
+    Returns corners ordered row by row or None if the pattern is not found
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    ret_corners, corners, meta = cv2.findChessboardCornersSBWithMeta(
+        gray,
+        chessboard_size,
+        flags=(
+            cv2.CALIB_CB_MARKER
+            | cv2.CALIB_CB_EXHAUSTIVE
+            | cv2.CALIB_CB_ACCURACY
+            | cv2.CALIB_CB_NORMALIZE_IMAGE
+        ),
+    )
+
+    if not ret_corners:
+        return None
+
+    if meta.shape[0] != chessboard_size[1]:
+        corners = corners.reshape(-1, 2)[_transposed_corners_order(chessboard_size)]
+        corners = corners[:, np.newaxis, :]
+
+    return corners
+
+
+def draw_preview_corners(preview, frame_shape, chessboard_size, corners):
+    """
+    Draw corners detected on a frame of frame_shape onto its resized preview
+    """
+    preview_scale = np.array(
+        [
+            preview.shape[1] / frame_shape[1],
+            preview.shape[0] / frame_shape[0],
+        ],
+        dtype=np.float32,
+    )
+    cv2.drawChessboardCorners(preview, chessboard_size, corners * preview_scale, True)
+
+
 class AsyncCBThreadedSolution(_ThreadedAsyncCB):
-    def __init__(self, chessboard_size):
-        def send(frame):
+    """
+    Detects the chessboard and prepares a preview of the frame in the worker thread,
+    so per camera work runs in parallel and only displaying is left to the caller
+    Accepts (frame, detect) where detect=False skips the detection for this frame
+    Result is (corners or None, frame, preview, detected)
+    NOTE: corners are only good enough for the preview, use find_accurate_corners for calibration
+    """
+
+    def __init__(self, chessboard_size, preview_size):
+        subpix_criteria = (
+            cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER,
+            30,
+            0.001,
+        )
+
+        def send(item):
+            frame, detect = item
+            preview = cv2.resize(frame, preview_size, interpolation=cv2.INTER_AREA)
+
+            if not detect:
+                return (None, frame, preview, False)
+
+            # Detect on a downscaled image and refine on the full one
             gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-            ret_corners, corners, meta = cv2.findChessboardCornersSBWithMeta(
-                gray,
+            small = cv2.resize(gray, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+            found, corners = cv2.findChessboardCorners(
+                small,
                 chessboard_size,
                 flags=(
-                    cv2.CALIB_CB_MARKER
-                    | cv2.CALIB_CB_EXHAUSTIVE
-                    | cv2.CALIB_CB_ACCURACY
+                    cv2.CALIB_CB_FAST_CHECK
+                    | cv2.CALIB_CB_ADAPTIVE_THRESH
                     | cv2.CALIB_CB_NORMALIZE_IMAGE
                 ),
             )
+            if not found:
+                return (None, frame, preview, True)
+
+            corners *= 2
+            corners = cv2.cornerSubPix(
+                gray, corners, (11, 11), (-1, -1), subpix_criteria
+            )
+
+            # Draw on the preview to keep the frame clean for the accurate detection
+            draw_preview_corners(preview, frame.shape, chessboard_size, corners)
 
-            if ret_corners:
-                if meta.shape[0] != chessboard_size[1]:
-                    corners = corners.reshape(-1, 2)
-                    corners = corners.reshape(*chessboard_size, 2)
-                    corners = corners.transpose(1, 0, 2)
-                    corners = corners.reshape(-1, 2)
-                    corners = corners[:, np.newaxis, :]
-                cv2.drawChessboardCorners(frame, chessboard_size, corners, ret_corners)
-                return (corners, frame)
-            else:
-                return (None, frame)
+            return (corners, frame, preview, True)
 
         super().__init__(send)
 
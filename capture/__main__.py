@@ -4,6 +4,9 @@ import sys
 os.environ["OPENCV_VIDEOIO_MSMF_ENABLE_HW_TRANSFORMS"] = "0"
 import cv2
 
+# Parallelism is done by the pipeline itself, prevent OpenCV's thread pool oversubscription
+cv2.setNumThreads(1)
+
 import multiprocessing
 import multiprocessing.synchronize
 import threading
@@ -14,7 +17,8 @@ import argparse
 from cam_conf import load_cameras_parameters
 from wrapped import Wrapped
 from models import CameraParams
-from finalizable_queue import ThreadFinalizableQueue, ProcessFinalizableQueue
+from finalizable_queue import ProcessFinalizableQueue
+from shared_frames import SharedFramesRing
 from cap_reading_loop import cap_reading
 from coupling_loop import coupling_loop
 from processing_loop import processing_loop
@@ -28,6 +32,7 @@ def main(
     cameras_params: Dict[int, CameraParams],
     couple_fps: int,
     desired_window_size: Tuple[int, int],
+    inference_width: int,
     workers: int,
     draw_origin_landmarks: bool,
 ):
@@ -40,9 +45,15 @@ def main(
 
     # Shared
     cams_stop_event = multiprocessing.Event()
-    last_frame: List[Wrapped[Tuple[np.ndarray, int] | None]] = [
+    last_frame: List[Wrapped[Tuple[np.ndarray, int, int] | None]] = [
         Wrapped() for _ in cameras_ids
     ]
+    new_frame_condition = threading.Condition()
+    grab_barrier = threading.Barrier(len(cameras_ids))
+    frames_ring = SharedFramesRing(
+        [(cp.size[1], cp.size[0], 3) for cp in cameras_params.values()],
+        slots=2 * workers,
+    )
 
     # Capture cameras
     caps: List[threading.Thread] = [
@@ -50,25 +61,32 @@ def main(
             target=cap_reading,
             args=(
                 idx,
+                reader_i,
                 cams_stop_event,
                 my_last_frame,
+                new_frame_condition,
+                grab_barrier,
                 cam_param,
             ),
             daemon=True,
         )
-        for my_last_frame, (idx, cam_param) in zip(last_frame, cameras_params.items())
+        for reader_i, (my_last_frame, (idx, cam_param)) in enumerate(
+            zip(last_frame, cameras_params.items())
+        )
     ]
     for process in caps:
         process.start()
 
     # Couple frames
-    coupled_frames_queue = ThreadFinalizableQueue()
+    coupled_frames_queue = ProcessFinalizableQueue()
     coupling_worker = threading.Thread(
         target=coupling_loop,
         args=(
             couple_fps,
             cams_stop_event,
             last_frame,
+            new_frame_condition,
+            frames_ring,
             coupled_frames_queue,
         ),
         daemon=True,
@@ -76,16 +94,18 @@ def main(
     coupling_worker.start()
 
     # Processing workers
-    hand_points_queue = ThreadFinalizableQueue()
-    processed_queues = [ThreadFinalizableQueue() for _ in cameras_ids]
+    hand_points_queue = ProcessFinalizableQueue()
+    processed_queues = [ProcessFinalizableQueue() for _ in cameras_ids]
     processing_loops_pool = [
-        threading.Thread(
+        multiprocessing.Process(
             target=processing_loop,
             args=(
                 [landmark_transforms[cp.track] for cp in cameras_params.values()],
                 draw_origin_landmarks,
                 desired_window_size,
+                inference_width,
                 list(cameras_params.values()),
+                frames_ring,
                 coupled_frames_queue,
                 hand_points_queue,
                 processed_queues,
@@ -181,6 +201,7 @@ def main(
     for worker in display_loops:
         worker.join()
 
+    frames_ring.dispose()
     cv2.destroyAllWindows()
 
 
@@ -200,6 +221,12 @@ if __name__ == "__main__":
         default="448x336",
         help="Size of a preview window",
     )
+    parser.add_argument(
+        "--inference_width",
+        type=int,
+        default=640,
+        help="Frames wider than that are downscaled before hand tracking",
+    )
     parser.add_argument(
         "--workers",
         type=int,
@@ -226,6 +253,7 @@ if __name__ == "__main__":
         cameras_params=load_cameras_parameters(args.cfile),
         couple_fps=args.couple_fps,
         desired_window_size=desired_window_size,
+        inference_width=args.inference_width,
         workers=args.workers,
         draw_origin_landmarks=args.origin_landmarks,
     )
@@ -1,6 +1,13 @@
-from typing import Dict
+import json
+from typing import Dict, List
 import cv2
-from .models import CameraParams, ExtrinsicCameraParams, IntrinsicCameraParams
+from .models import (
+    CameraParams,
+    CamerasBank,
+    ExtrinsicCameraParams,
+    IntrinsicCameraParams,
+)
+from .undistortion import make_undistortion_map
 import json5
 import numpy as np
 
@@ -8,6 +15,9 @@ import numpy as np
 def load_cam_params(cam_decl):
     idx = cam_decl["index"]
 
+    size = tuple(map(int, cam_decl["size"].split("x")))
+    assert len(size) == 2
+
     # Intrinsic parameters
     intrinsic = cam_decl["intrinsic"]
     intrinsic_mtx = np.array(
@@ -26,6 +36,7 @@ def load_cam_params(cam_decl):
         ]
     )
     dist_coeffs = np.array(intrinsic["dist_coeffs"])
+    undistortion_map = make_undistortion_map(intrinsic_mtx, dist_coeffs, size)
 
     # Extrinsic parameters
     extrinsic = cam_decl["extrinsic"]
@@ -49,10 +60,12 @@ def load_cam_params(cam_decl):
     P = intrinsic_mtx @ RT  # Projection matrix
 
     # Return parameters
-    size = tuple(map(int, cam_decl["size"].split("x")))
-    assert len(size) == 2
     return idx, CameraParams(
-        intrinsic=IntrinsicCameraParams(mtx=intrinsic_mtx, dist_coeffs=dist_coeffs),
+        intrinsic=IntrinsicCameraParams(
+            mtx=intrinsic_mtx,
+            dist_coeffs=dist_coeffs,
+            undistortion_map=undistortion_map,
+        ),
         extrinsic=ExtrinsicCameraParams(rvec=rvec, T=T, R=R),
         focus=cam_decl["focus"],
         fps=cam_decl["fps"],
@@ -64,7 +77,14 @@ def load_cam_params(cam_decl):
 
 def load_cameras_parameters(calibrations_file: str) -> Dict[int, CameraParams]:
     with open(calibrations_file, "r") as f:
-        cameras_calibs = json5.load(f)
+        content = f.read()
+
+    # Calibration script writes strict json, parse it with the much faster stdlib
+    # falling back to json5 for hand edited files (comments, unquoted keys, etc.)
+    try:
+        cameras_calibs = json.loads(content)
+    except json.JSONDecodeError:
+        cameras_calibs = json5.loads(content)
 
     cameras: Dict[int, CameraParams] = {}
     for cam_decl in cameras_calibs:
@@ -72,3 +92,10 @@ def load_cameras_parameters(calibrations_file: str) -> Dict[int, CameraParams]:
         cameras[idx] = params
 
     return cameras
+
+
+def make_cameras_bank(cameras_params: List[CameraParams]) -> CamerasBank:
+    return CamerasBank(
+        Ps=np.stack([cp.P for cp in cameras_params]),
+        sizes=np.array([cp.size for cp in cameras_params], dtype=np.float32),
+    )
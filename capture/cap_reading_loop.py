@@ -1,6 +1,8 @@
 import multiprocessing
 import multiprocessing.synchronize
+import os
 import sys
+import threading
 from typing import Tuple
 import cv2
 import numpy as np
@@ -9,55 +11,113 @@ from .wrapped import Wrapped
 from .fps_counter import FPSCounter
 from .models import CameraParams
 
+FRAMES_RING_SIZE = 3
+
 
 def cap_reading(
     idx: int,
+    reader_i: int,
     stop_event: multiprocessing.synchronize.Event,
-    my_last_frame: Wrapped[Tuple[np.ndarray, int] | None],
+    my_last_frame: Wrapped[Tuple[np.ndarray, int, int] | None],
+    new_frame_condition: threading.Condition,
+    grab_barrier: threading.Barrier,
     cam_param: CameraParams,
 ):
-    # Initialize video capture
-    cap = cv2.VideoCapture(idx)
-    if not cap.isOpened():
-        print(f"Error: Could not open camera {idx}", file=sys.stderr)
-        return
-
-    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc("M", "J", "P", "G"))  # type: ignore
-
-    # Set resolution and fps
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, cam_param.size[0])
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, cam_param.size[1])
-    cap.set(cv2.CAP_PROP_FPS, cam_param.fps)
-
-    # Try disabling autofocus
-    autofocus_supported = cap.get(cv2.CAP_PROP_AUTOFOCUS) != -1
-    if autofocus_supported:
-        cap.set(cv2.CAP_PROP_AUTOFOCUS, 0)
-
-    # Set manual focus value
-    focus_value = cam_param.focus
-    focus_supported = cap.set(cv2.CAP_PROP_FOCUS, focus_value)
-    if not focus_supported:
-        print(
-            f"Camera {idx} does not support manual focus! (or invalid focus value)",
-            file=sys.stderr,
-        )
-        return
-
-    # FPS tracking variables
-    fps_counter = FPSCounter()
-
-    while True:
-        if stop_event.is_set():
-            break
-
-        ret, frame = cap.read()
-        if not ret:
-            print(f"Error: Could not read from camera {idx}", file=sys.stderr)
-            break
-
-        my_last_frame.set((frame, fps_counter.get_fps()))
-        fps_counter.count()
-
-    cap.release()
+    # Keep the reader on one of the allowed cores (Linux only), best-effort,
+    # sched_setaffinity(0) applies to the calling thread
+    # NOTE: spread by the reader position, device indices are often sparse (0, 2, 4, ...)
+    if hasattr(os, "sched_setaffinity"):
+        allowed_cpus = sorted(os.sched_getaffinity(0))
+        try:
+            os.sched_setaffinity(0, {allowed_cpus[reader_i % len(allowed_cpus)]})
+        except OSError as e:
+            print(f"Warning: Could not pin camera {idx} reader: {e}", file=sys.stderr)
+
+    cap = None
+    try:
+        # Initialize video capture
+        cap = cv2.VideoCapture(idx)
+        if not cap.isOpened():
+            print(f"Error: Could not open camera {idx}", file=sys.stderr)
+            return
+
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc("M", "J", "P", "G"))  # type: ignore
+
+        # Set resolution and fps
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, cam_param.size[0])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, cam_param.size[1])
+        cap.set(cv2.CAP_PROP_FPS, cam_param.fps)
+
+        # Keep only the latest frame in the driver queue, stale frames only add latency
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        # Try disabling autofocus
+        autofocus_supported = cap.get(cv2.CAP_PROP_AUTOFOCUS) != -1
+        if autofocus_supported:
+            cap.set(cv2.CAP_PROP_AUTOFOCUS, 0)
+
+        # Set manual focus value
+        focus_value = cam_param.focus
+        focus_supported = cap.set(cv2.CAP_PROP_FOCUS, focus_value)
+        if not focus_supported:
+            print(
+                f"Camera {idx} does not support manual focus! (or invalid focus value)",
+                file=sys.stderr,
+            )
+            return
+
+        # FPS tracking variables
+        fps_counter = FPSCounter()
+
+        # Frames are decoded into a ring of preallocated buffers instead of a new array per read,
+        # the consumer is expected to be done with a frame before the ring wraps around to its slot
+        ring = [
+            np.empty((cam_param.size[1], cam_param.size[0], 3), dtype=np.uint8)
+            for _ in range(FRAMES_RING_SIZE)
+        ]
+        slot = 0
+        seq = 0
+
+        while True:
+            if stop_event.is_set():
+                break
+
+            # Grab on all the cameras at nearly the same moment,
+            # decoding is done afterwards in parallel by each reader
+            try:
+                grab_barrier.wait()
+            except threading.BrokenBarrierError:
+                break
+
+            ret = cap.grab()
+            if ret:
+                ret, frame = cap.retrieve(ring[slot])
+            if not ret:
+                print(f"Error: Could not read from camera {idx}", file=sys.stderr)
+                break
+
+            # Calibration (and the frames transport) is valid only for the configured size
+            if frame.shape != ring[slot].shape:
+                print(
+                    f"Error: Camera {idx} gives {frame.shape[1]}x{frame.shape[0]} frames, "
+                    f"expected {cam_param.size[0]}x{cam_param.size[1]}",
+                    file=sys.stderr,
+                )
+                break
+            slot = (slot + 1) % FRAMES_RING_SIZE
+
+            # Publish the frame along with its sequence number
+            with new_frame_condition:
+                my_last_frame.set((frame, fps_counter.get_fps(), seq))
+                new_frame_condition.notify_all()
+            seq += 1
+            fps_counter.count()
+    finally:
+        # Readers grab in lockstep, so once this one is gone the others can't go on,
+        # neither can the whole app: stop it instead of leaving frozen windows open
+        grab_barrier.abort()
+        stop_event.set()
+        if cap is not None:
+            cap.release()
+
     print(f"Camera {idx} finished.")
@@ -1,5 +1,6 @@
 import multiprocessing
 import multiprocessing.synchronize
+import threading
 import time
 from typing import List, Tuple
 import cv2
@@ -9,21 +10,28 @@ import numpy as np
 from .wrapped import Wrapped
 from .fps_counter import FPSCounter
 from .finalizable_queue import FinalizableQueue
+from .shared_frames import SharedFramesRing
 
 
 def coupling_loop(
     couple_fps: int,
     stop_event: multiprocessing.synchronize.Event,
-    last_frame: List[Wrapped[Tuple[np.ndarray, int] | None]],
+    last_frame: List[Wrapped[Tuple[np.ndarray, int, int] | None]],
+    new_frame_condition: threading.Condition,
+    frames_ring: SharedFramesRing,
     coupled_frames_queue: FinalizableQueue,
 ):
     target_frame_interval = 1 / couple_fps
 
-    # Wait until at least one frame is available from all cameras
-    while True:
-        if all(a_last_frame.get() is not None for a_last_frame in last_frame):
-            break
-        time.sleep(0.1)
+    # Sequence numbers of the last coupled frames
+    coupled_seq = [-1 for _ in last_frame]
+
+    def all_frames_are_new():
+        for a_last_frame, seq in zip(last_frame, coupled_seq):
+            v = a_last_frame.get()
+            if v is None or v[2] <= seq:
+                return False
+        return True
 
     fps_counter = FPSCounter()
     index = 0
@@ -31,23 +39,40 @@ def coupling_loop(
     while True:
         start_time = time.time()
 
+        # Wait until every camera has a frame that is not coupled yet
+        with new_frame_condition:
+            while not (stop_event.is_set() or all_frames_are_new()):
+                new_frame_condition.wait(0.1)
+
         if stop_event.is_set():
             break
 
+        # Wait for a free slot to put the frames into
+        slot = None
+        while slot is None and not stop_event.is_set():
+            slot = frames_ring.acquire(timeout=0.1)
+
+        if slot is None:
+            break
+
         fps_counter.count()
 
-        frames = []
-        for frame in last_frame:
-            v = frame.get()
+        cap_fps = []
+        for i, (a_last_frame, shared_frame) in enumerate(
+            zip(last_frame, frames_ring.frames(slot))
+        ):
+            v = a_last_frame.get()
             assert v is not None
-            frame, fps = v
-            frames.append((cv2.flip(frame, 1), fps))
+            frame, fps, coupled_seq[i] = v
+            # NOTE: frame is a slot of the reader's ring buffer, flip copies it into the shared slot
+            cv2.flip(frame, 1, dst=shared_frame)
+            cap_fps.append(fps)
 
         # Send coupled frames
-        coupled_frames_queue.put((index, frames, fps_counter.get_fps()))
+        coupled_frames_queue.put((index, slot, cap_fps, fps_counter.get_fps()))
         index += 1
 
-        # Rate-limit to ~couple_fps FPS
+        # Rate-limit to at most ~couple_fps FPS
         elapsed_time = time.time() - start_time
         sleep_time = max(0, target_frame_interval - elapsed_time)
         time.sleep(sleep_time)
@@ -5,13 +5,18 @@ import numpy as np
 from typing import Tuple
 import mediapipe as mp
 
-from .projection import compute_sphere_rotating_camera_projection_matrix, project
+from .projection import (
+    compute_sphere_rotating_camera_projection_matrix,
+    project,
+    project_points,
+)
 from .finalizable_queue import EmptyFinalized, FinalizableQueue
 from .fps_counter import FPSCounter
 from .draw_utils import draw_left_top, draw_right_bottom
 
 
 mp_hands = mp.solutions.hands  # type: ignore
+hand_connections = np.array(list(mp_hands.HAND_CONNECTIONS))  # (num_connections, 2)
 
 
 def hand_3d_visualization_loop(
@@ -139,39 +144,31 @@ def hand_3d_visualization_loop(
             frame.shape[0],
         )
 
-        # Project points
-        landmarks = [project(point_3d, P) for point_3d in hand_points]
-
-        if len(landmarks) != 0:
-            # Draw hand connections
-            for connection in mp_hands.HAND_CONNECTIONS:
-                start_idx, end_idx = connection
-                start_pt, z_start = landmarks[start_idx]
-                end_pt, z_end = landmarks[end_idx]
-
-                # Skip drawing if either point is behind the camera
-                if z_start <= 0 or z_end <= 0:
-                    continue
-
-                # Draw the line
-                cv2.line(
+        if len(hand_points) != 0:
+            # Project points
+            landmarks, zs = project_points(np.asarray(hand_points), P)
+            landmarks = landmarks.astype(np.int32)
+            in_front = zs > 0
+
+            # Draw hand connections at once
+            # skipping the ones with either point behind the camera
+            visible_connections = hand_connections[
+                in_front[hand_connections].all(axis=1)
+            ]
+            if len(visible_connections) != 0:
+                cv2.polylines(
                     frame,
-                    (int(start_pt[0]), int(start_pt[1])),
-                    (int(end_pt[0]), int(end_pt[1])),
+                    landmarks[visible_connections],
+                    isClosed=False,
                     color=(255, 255, 255),
                     thickness=1,
                 )
 
-            # Draw landmarks (circles)
-            for lm, z in landmarks:
-                # Skip drawing if the point is behind the camera
-                if z <= 0:
-                    continue
-
-                # Draw the circle
+            # Draw landmarks (circles) that are in front of the camera
+            for lm in landmarks[in_front].tolist():
                 cv2.circle(
                     frame,
-                    (int(lm[0]), int(lm[1])),
+                    tuple(lm),
                     radius=3,
                     color=(0, 255, 0),
                     thickness=-1,
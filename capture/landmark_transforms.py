@@ -4,50 +4,50 @@ from .linal_utils import is_point_in_smoothed_polygon
 # NOTE: updating this file dont forget to sync the description of "track" parameter with cameras.def.example.json5
 
 _fingers_ids = [2, 3, 4, 6, 7, 8, 10, 11, 12, 14, 15, 16, 18, 19, 20]
+_fingers_mask = np.zeros(21, dtype=bool)
+_fingers_mask[_fingers_ids] = True
+
+# NOTE: landmarks are given as (21, 2) array of normalized coords, dropped landmarks are set to nan
+
+
+def _full(landmarks):
+    return landmarks
 
 
 def _fingers(landmarks):
-    return [None if i not in _fingers_ids else lm for i, lm in enumerate(landmarks)]
+    return np.where(_fingers_mask[:, np.newaxis], landmarks, np.nan)
 
 
 def _palm(landmarks):
-    return [None if i in _fingers_ids else lm for i, lm in enumerate(landmarks)]
+    return np.where(_fingers_mask[:, np.newaxis], np.nan, landmarks)
 
 
 def _back(landmarks):
     """
-    Set finger landmarks to None if they are outside the smoothed polygon defined by palm landmarks.
-    :param landmarks: List of (x, y) tuples or None, representing landmarks.
-    :return: Modified landmarks list with some points set to None.
+    Set finger landmarks to nan if they are outside the smoothed polygon defined by palm landmarks.
+    :param landmarks: (21, 2) array of (x, y) landmarks, nan for missing ones.
+    :return: Modified landmarks array with some points set to nan.
     """
-    if any(lm is None for lm in landmarks):
-        return [None for _ in landmarks]
+    if np.isnan(landmarks).any():
+        return np.full_like(landmarks, np.nan)
 
     # Extract palm landmarks (polygon vertices)
-    palm_lms = np.array(
-        [[lm.x, lm.y] for i, lm in enumerate(landmarks) if i not in _fingers_ids]
-    )
+    palm_lms = landmarks[~_fingers_mask]
 
     SMOOTHING_DISTANCE = 0.06
-    updated_landmarks = landmarks[:]
+    updated_landmarks = landmarks.copy()
 
     # Finger landmark may be thrown individually
-    for i, lm in enumerate(landmarks):
-        # Skip palm landmarks
-        if i not in _fingers_ids:
-            continue
-
+    for i in _fingers_ids:
         # Check if the landmark is in the smoothed polygon - e.g. covered by palm
-        if is_point_in_smoothed_polygon(
-            np.array([lm.x, lm.y]), palm_lms, SMOOTHING_DISTANCE
-        ):
-            updated_landmarks[i] = None
+        if is_point_in_smoothed_polygon(landmarks[i], palm_lms, SMOOTHING_DISTANCE):
+            updated_landmarks[i] = np.nan
 
     return updated_landmarks
 
 
 landmark_transforms = {
-    "full": lambda x: x,
+    "full": _full,
     "fingers": _fingers,
     "palm": _palm,
     "back": _back,
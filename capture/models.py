@@ -6,6 +6,7 @@ from pydantic import BaseModel
 class IntrinsicCameraParams(BaseModel):
     mtx: np.ndarray
     dist_coeffs: np.ndarray
+    undistortion_map: np.ndarray  # HxWx2, see make_undistortion_map
 
     class Config:
         arbitrary_types_allowed = True
@@ -33,6 +34,18 @@ class CameraParams(BaseModel):
         arbitrary_types_allowed = True
 
 
+class CamerasBank(BaseModel):
+    """
+    Parameters of all the cameras stacked into arrays, so that they can be used in a batch
+    """
+
+    Ps: np.ndarray  # Nx3x4 projection matrices
+    sizes: np.ndarray  # Nx2 frame sizes as (w, h)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
 class ContextedLandmark(BaseModel):
     cam_idx: int
     P: np.ndarray
@@ -1,12 +1,17 @@
+from concurrent.futures import ThreadPoolExecutor
+import sys
 import cv2
 import numpy as np
 from typing import Any, Callable, List, Tuple
 import mediapipe as mp
 
-from .models import CameraParams, ContextedLandmark
-from .triangulation import triangulate_lmcs
+from .models import CameraParams
+from .cam_conf import make_cameras_bank
+from .triangulation import refine_landmarks, triangulate_landmarks
 from .projection import distorted_project
+from .undistortion import undistort_pixels
 from .finalizable_queue import EmptyFinalized, FinalizableQueue
+from .shared_frames import SharedFramesRing
 from .draw_utils import draw_left_top
 from .hand_normalization import normalize_hand
 
@@ -19,11 +24,19 @@ def processing_loop(
     landmark_transforms: List[Callable[..., Any]],
     draw_origin_landmarks: bool,
     desired_window_size: Tuple[int, int],
+    inference_width: int,
     cameras_params: List[CameraParams],
+    frames_ring: SharedFramesRing,
     coupled_frames_queue: FinalizableQueue,
     hand_points_queue: FinalizableQueue,
     out_queues: List[FinalizableQueue],
 ):
+    # Workers run in parallel already, spawned processes don't inherit the main's setting
+    cv2.setNumThreads(1)
+
+    # One processor per camera: each one tracks the hand between frames of its own camera,
+    # and the palm detector sees the whole input downscaled, so a montage of all cameras
+    # would break the tracking and shrink the hands for detection
     processors = [
         mp_hands.Hands(
             static_image_mode=False,
@@ -34,6 +47,111 @@ def processing_loop(
         for _ in range(len(cameras_params))
     ]
 
+    # Parameters of all the cameras stacked together
+    bank = make_cameras_bank(cameras_params)
+
+    # Reusable MediaPipe input buffers, allocated on the first frame
+    small_frames: List[np.ndarray | None] = [None for _ in cameras_params]
+    rgb_frames: List[np.ndarray | None] = [None for _ in cameras_params]
+
+    def find_landmarks(pov_i: int, frame: np.ndarray) -> np.ndarray:
+        """
+        Landmarks of the left hand on the frame of the pov in normalized coords,
+        returns (num_landmarks, 2) array, missing ones are nan
+        """
+        # Downscale for inference, MediaPipe runs at a way lower resolution internally
+        # and landmarks are normalized, so this doesn't affect their coordinates
+        h, w, _ = frame.shape
+        if w > inference_width:
+            small_shape = (round(h * inference_width / w), inference_width, 3)
+            small_frame = small_frames[pov_i]
+            if small_frame is None or small_frame.shape != small_shape:
+                small_frame = small_frames[pov_i] = np.empty(
+                    small_shape, dtype=frame.dtype
+                )
+            cv2.resize(
+                frame,
+                (small_shape[1], small_shape[0]),
+                dst=small_frame,
+                interpolation=cv2.INTER_AREA,
+            )
+            frame = small_frame
+
+        # Convert to RGB and process
+        frame_rgb = rgb_frames[pov_i]
+        if frame_rgb is None or frame_rgb.shape != frame.shape:
+            frame_rgb = rgb_frames[pov_i] = np.empty_like(frame)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame_rgb)
+        res = processors[pov_i].process(frame_rgb)
+
+        # Extract landmarks in normalized coords, missing ones are nan
+        pov_landmarks = np.full((num_landmarks, 2), np.nan, dtype=np.float32)
+        if res.multi_hand_landmarks:
+            for hand_landmarks, handedness in zip(
+                res.multi_hand_landmarks, res.multi_handedness
+            ):
+                if handedness.classification[0].label == "Left":
+                    pov_landmarks = np.fromiter(
+                        (v for lm in hand_landmarks.landmark for v in (lm.x, lm.y)),
+                        dtype=np.float32,
+                        count=2 * num_landmarks,
+                    ).reshape(num_landmarks, 2)
+                    pov_landmarks = landmark_transforms[pov_i](pov_landmarks)
+                    break
+
+        assert pov_landmarks.shape == (num_landmarks, 2)
+        return pov_landmarks
+
+    # Runs the trackers of different cameras in parallel, as each of them is independent
+    trackers_pool = ThreadPoolExecutor(max_workers=len(cameras_params))
+
+    def triangulate_hand(frames: List[np.ndarray]):
+        """
+        Find landmarks on the frames of all povs and triangulate them,
+        returns (landmarks, present, points_3d), points_3d is None if the hand is dropped
+        """
+        # Find landmarks of all povs concurrently, MediaPipe releases the GIL while inferring
+        # landmarks_povs[pov_id] is (num_landmarks, 2) array
+        landmarks_povs = list(
+            trackers_pool.map(find_landmarks, range(len(frames)), frames)
+        )
+
+        landmarks = np.stack(landmarks_povs)  # lm = landmarks[pov_id][lm_id]
+        present = ~np.isnan(landmarks[..., 0])  # present[pov_id][lm_id]
+
+        # Triangulate points across the cameras (if all landmarks are present at least on two cameras)
+        # so that the full triangulation is dropped if cannot triangulate a landmark
+        points_3d: np.ndarray | None = None  # (num_landmarks, 3), points_3d[lm_id]
+        if (present.sum(axis=0) >= 2).all():
+            # Landmarks to pixel coords of all povs at once
+            # NOTE: frames are checked to match the calibrated size when captured
+            pixel_landmarks = landmarks * bank.sizes[:, np.newaxis, :]
+
+            # Undistort landmarks of each pov in one go
+            undistorted_landmarks = np.full_like(landmarks, np.nan)
+            for pov_i, pov_params in enumerate(cameras_params):
+                # Skip landmarks that are not present
+                pov_present = present[pov_i]
+                if not pov_present.any():
+                    continue
+
+                # Undistort pixel coords
+                intrinsics = pov_params.intrinsic
+                undistorted_landmarks[pov_i, pov_present] = undistort_pixels(
+                    intrinsics.undistortion_map,
+                    pixel_landmarks[pov_i, pov_present],
+                    intrinsics.mtx,
+                    intrinsics.dist_coeffs,
+                )
+
+            # Triangulate all landmarks at once, every pov a landmark is present on is involved
+            points_3d = triangulate_landmarks(bank.Ps, undistorted_landmarks, present)
+            points_3d = refine_landmarks(
+                bank.Ps, undistorted_landmarks, present, points_3d
+            )
+
+        return landmarks, present, points_3d
+
     while True:
         try:
             elem = coupled_frames_queue.get()
@@ -41,152 +159,109 @@ def processing_loop(
             break
 
         index: int = elem[0]
-        indexed_frames: List[Tuple[np.ndarray, int]] = elem[1]
-        coupling_fps: int = elem[2]
-
-        cap_fps: List[int] = [item[1] for item in indexed_frames]
-        frames: List[np.ndarray] = [item[0] for item in indexed_frames]
-
-        del indexed_frames
-
-        # Find landmarks
-        landmarks = [[] for _ in range(num_landmarks)]  # lm = landmarks[lm_id][pov_id]
-        for landmark_transform, processor, frame in zip(
-            landmark_transforms, processors, frames
-        ):
-            # Convert to RGB and process
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            res = processor.process(frame_rgb)
-
-            # Extract landmarks
-            pov_landmarks = [None for _ in range(num_landmarks)]
-            if res.multi_hand_landmarks:
-                for hand_landmarks, handedness in zip(
-                    res.multi_hand_landmarks, res.multi_handedness
-                ):
-                    if handedness.classification[0].label == "Left":
-                        pov_landmarks = landmark_transform(hand_landmarks.landmark)
-                        break
-
-            # Store landmarks regrouping by landmark id first
-            assert len(pov_landmarks) == num_landmarks
-            for i, lm in enumerate(pov_landmarks):
-                landmarks[i].append(lm)
-
-        # Triangulate points across the cameras (if all landmarks are present at least on two cameras)
-        # so that the full triangulation is dropped if cannot triangulate a landmark
-        chosen_cams = []  # chosen_cams[lm_id]
-        points_3d = []  # points_3d[lm_id]
-        if all(
-            sum(1 for lm in lm_povs if lm is not None) >= 2 for lm_povs in landmarks
-        ):
-            for lm_povs in landmarks:
-                lmcs = []
-                for pov_i, (frame, pov_params, lm) in enumerate(
-                    zip(frames, cameras_params, lm_povs)
-                ):
-                    # Skip if lm is not present
-                    if lm is None:
-                        continue
-
-                    # Landmark to pixel coord
-                    h, w, _ = frame.shape
-                    pixel_pt = [lm.x * w, lm.y * h]
-
-                    # Undistort pixel coord
-                    intrinsics = pov_params.intrinsic
-                    undistorted_lm = cv2.undistortPoints(
-                        np.array([[pixel_pt]], dtype=np.float32),
-                        intrinsics.mtx,
-                        intrinsics.dist_coeffs,
-                        P=intrinsics.mtx,
-                    )[0][0]
-
-                    # Append the result
-                    lmcs.append(
-                        ContextedLandmark(
-                            cam_idx=pov_i,
-                            P=pov_params.P,
-                            lm=undistorted_lm,
-                        )
-                    )
-
-                chosen, point_3d = triangulate_lmcs(lmcs)
+        slot: int = elem[1]
+        cap_fps: List[int] = elem[2]
+        coupling_fps: int = elem[3]
 
-                chosen_cams.append(chosen)
-                points_3d.append(point_3d)
+        # NOTE: frames are views into the shared ring, they must be kept read-only
+        #       and not used after the slot is released
+        frames: List[np.ndarray] = frames_ring.frames(slot)
 
-        # Send to 3d visualization
-        hand_points_queue.put(
-            (
-                index,
+        # NOTE: the slot must be released and the index delivered whatever happens,
+        #       otherwise the ring runs out of slots and the ordering loops get stuck
+        try:
+            try:
+                landmarks, present, points_3d = triangulate_hand(frames)
+                hand_points = normalize_hand(points_3d) if points_3d is not None else []
+            except Exception as e:
+                print(
+                    f"Error: Could not process frames {index}: {e!r}", file=sys.stderr
+                )
+                landmarks = np.full(
+                    (len(frames), num_landmarks, 2), np.nan, dtype=np.float32
+                )
+                present = np.zeros((len(frames), num_landmarks), dtype=bool)
+                points_3d = None
+                hand_points = []
+
+            # Size of the backlog, multiprocessing queues can't tell it on some platforms (macOS)
+            try:
+                debt_size: int | str = coupled_frames_queue.qsize()
+            except NotImplementedError:
+                debt_size = "unknown"
+
+            # Send to 3d visualization
+            hand_points_queue.put(
                 (
-                    normalize_hand(points_3d) if points_3d else [],
-                    coupling_fps,
-                    coupled_frames_queue.qsize(),
-                ),
+                    index,
+                    (
+                        hand_points,
+                        coupling_fps,
+                        debt_size,
+                    ),
+                )
             )
-        )
 
-        # Resize frames before drawing
-        for i, frame in enumerate(frames):
-            frames[i] = cv2.resize(
-                frame, desired_window_size, interpolation=cv2.INTER_AREA
-            )
+            # Resize frames before drawing
+            frames = [
+                cv2.resize(frame, desired_window_size, interpolation=cv2.INTER_AREA)
+                for frame in frames
+            ]
+        finally:
+            # Done with the shared frames
+            frames_ring.release(slot)
 
         # Draw original landmarks
         if draw_origin_landmarks:
-            for origin_landmarks, frame in zip(landmarks, frames):
-                if origin_landmarks is None:
-                    continue
-
+            for pov_landmarks, pov_present, frame in zip(landmarks, present, frames):
                 h, w, _ = frame.shape
+                origin_landmarks = (
+                    np.nan_to_num(pov_landmarks) * np.array([w, h], dtype=np.float32)
+                ).astype(int)
                 for connection in mp_hands.HAND_CONNECTIONS:
                     start_idx, end_idx = connection
-                    start_pt = origin_landmarks[start_idx]
-                    end_pt = origin_landmarks[end_idx]
+                    if not (pov_present[start_idx] and pov_present[end_idx]):
+                        continue
                     cv2.line(
                         frame,
-                        (int(start_pt.x * w), int(start_pt.y * h)),
-                        (int(end_pt.x * w), int(end_pt.y * h)),
+                        tuple(origin_landmarks[start_idx].tolist()),
+                        tuple(origin_landmarks[end_idx].tolist()),
                         color=(0, 200, 200),
                         thickness=1,
                     )
-                for lm in origin_landmarks:
+                for lm, lm_present in zip(origin_landmarks.tolist(), pov_present):
+                    if not lm_present:
+                        continue
                     cv2.circle(
                         frame,
-                        (int(lm.x * w), int(lm.y * h)),
+                        tuple(lm),
                         radius=3,
                         color=(0, 200, 200),
                         thickness=-1,
                     )
 
         # Draw reprojected landmarks
-        if points_3d:
+        if points_3d is not None:
             for pov_i, (frame, params) in enumerate(zip(frames, cameras_params)):
-                # Project 3D points onto each camera
-                reprojected_lms: List[Tuple[int, int]] = []
-                for point_3d in points_3d:
-                    x, y = distorted_project(
-                        point_3d,
-                        params.extrinsic.rvec,
-                        params.extrinsic.T,
-                        params.intrinsic.mtx,
-                        params.intrinsic.dist_coeffs,
-                    )
-
-                    # camera pixel coordinates -> normalized coordinates
-                    x, y = x / params.size[0], y / params.size[1]
+                # Camera pixel coordinates -> real viewport pixel coordinates
+                h, w, _ = frame.shape
+                scale_x, scale_y = w / params.size[0], h / params.size[1]
 
-                    # normalized coordinates -> real viewport pixel coordinates
-                    h, w, _ = frame.shape
-                    x, y = x * w, y * h
+                # Project 3D points onto each camera
+                projected = distorted_project(
+                    points_3d,
+                    params.extrinsic.rvec,
+                    params.extrinsic.T,
+                    params.intrinsic.mtx,
+                    params.intrinsic.dist_coeffs,
+                ) * (scale_x, scale_y)
 
-                    # Clip to image size
-                    x = max(min(int(x), frame.shape[1] - 1), 0)
-                    y = max(min(int(y), frame.shape[0] - 1), 0)
+                # Clip to image size
+                projected = np.clip(projected.astype(int), 0, (w - 1, h - 1))
 
-                    reprojected_lms.append((x, y))
+                reprojected_lms: List[Tuple[int, int]] = [
+                    (x, y) for x, y in projected.tolist()
+                ]
 
                 # Draw reptojected landmarks
                 for connection in mp_hands.HAND_CONNECTIONS:
@@ -201,9 +276,9 @@ def processing_loop(
                         thickness=1,
                     )
                 for involved_in_triangulating_this_lm, lm in zip(
-                    chosen_cams, reprojected_lms
+                    present[pov_i].tolist(), reprojected_lms
                 ):
-                    if pov_i in involved_in_triangulating_this_lm:
+                    if involved_in_triangulating_this_lm:
                         color = (0, 255, 0)  # Chosen camera
                     else:
                         color = (255, 0, 0)  # Others
@@ -219,6 +294,7 @@ def processing_loop(
 
         coupled_frames_queue.task_done()
 
+    trackers_pool.shutdown()
     for processor in processors:
         processor.close()
 
@@ -2,20 +2,19 @@ import cv2
 import numpy as np
 
 
-def distorted_project(point3d, rvec, T, intrinsic_mtx, dist_coeffs):
+def distorted_project(points3d, rvec, T, intrinsic_mtx, dist_coeffs):
     """
-    Project with distortion
-    Result is in pixel coordinates
+    Project Nx3 points with distortion
+    Result is Nx2 in pixel coordinates
     """
-    projected_point, _ = cv2.projectPoints(
-        point3d,
+    projected_points, _ = cv2.projectPoints(
+        points3d,
         rvec,
         T,
         intrinsic_mtx,
         dist_coeffs,
     )
-    projected_point = projected_point[0][0]
-    return projected_point[0], projected_point[1]
+    return projected_points.reshape(-1, 2)
 
 
 def project(point3d, P):
@@ -46,6 +45,23 @@ def project(point3d, P):
     return pixel_coordinates, normalized_z
 
 
+def project_points(points3d, P):
+    """
+    Batched alternative to project
+
+    Parameters:
+        points3d (np.array): Nx3 points.
+        P (np.array): The 4x4 projection matrix.
+
+    Returns:
+        tuple: (pixel_coordinates, normalized_z)
+            pixel_coordinates (np.array): Nx2 pixel coordinates.
+            normalized_z (np.array): N depth values.
+    """
+    pixel_homogeneous = points3d @ P[:, :3].T + P[:, 3]
+    return pixel_homogeneous[:, :2] / pixel_homogeneous[:, 2:3], pixel_homogeneous[:, 2]
+
+
 def compute_sphere_rotating_camera_projection_matrix(
     fov, near, far, spherical_pos, roll, distance, target, frame_width, frame_height
 ):
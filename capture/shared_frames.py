@@ -0,0 +1,46 @@
+import multiprocessing
+import queue
+from multiprocessing import shared_memory
+from typing import List, Tuple
+import numpy as np
+
+
+class SharedFramesRing:
+    """
+    Ring of slots in shared memory, each slot holds one frame per camera
+    Lets processes exchange coupled frames without pickling them:
+    the producer acquires a free slot and fills it, the consumer releases the slot when done with it
+    """
+
+    def __init__(self, shapes: List[Tuple[int, int, int]], slots: int):
+        self._shapes = shapes
+        self._slot_size = sum(int(np.prod(shape)) for shape in shapes)
+        self._shm = shared_memory.SharedMemory(
+            create=True, size=self._slot_size * slots
+        )
+        self._free_slots = multiprocessing.Queue()
+        for slot in range(slots):
+            self._free_slots.put(slot)
+
+    def acquire(self, timeout: float | None = None) -> int | None:
+        try:
+            return self._free_slots.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def release(self, slot: int) -> None:
+        self._free_slots.put(slot)
+
+    def frames(self, slot: int) -> List[np.ndarray]:
+        frames = []
+        offset = slot * self._slot_size
+        for shape in self._shapes:
+            frames.append(
+                np.ndarray(shape, dtype=np.uint8, buffer=self._shm.buf, offset=offset)
+            )
+            offset += int(np.prod(shape))
+        return frames
+
+    def dispose(self) -> None:
+        self._shm.close()
+        self._shm.unlink()
@@ -86,3 +86,79 @@ def triangulate_lmcs(lmcs: List[ContextedLandmark]):
         return [lmc.cam_idx for lmc in lmcs], X[:3]
     else:
         return [], None
+
+
+def triangulate_landmarks(Ps, lms, present):
+    """
+    Triangulate all landmarks at once from multiple point of views.
+    Batched alternative to triangulate_lmcs, every landmark must be present at least on two povs
+
+    Parameters:
+        Ps (np.array): (N, 3, 4) projection matrices of the povs.
+        lms (np.array): (N, L, 2) undistorted pixel coords of the landmarks on each pov.
+        present (np.array): (N, L) mask of the landmarks present on each pov.
+
+    Returns:
+        np.array: (L, 3) triangulated points.
+    """
+    # DLT rows of every landmark on every pov, shaped (N, L, 2, 4)
+    rows = (
+        lms[..., np.newaxis] * Ps[:, np.newaxis, np.newaxis, 2, :]
+        - Ps[:, np.newaxis, :2, :]
+    )
+
+    # Zero rows of missing landmarks so that they don't affect the solution
+    rows = np.where(present[..., np.newaxis, np.newaxis], rows, 0)
+
+    # Fix the homogeneous coordinate to 1 and solve the least squares via 3x3 normal equations,
+    # that is way cheaper than SVD; the equations are summed up over the povs directly
+    AtA = np.einsum("nlij,nlik->ljk", rows[..., :3], rows[..., :3])
+    Atb = -np.einsum("nlij,nli->lj", rows[..., :3], rows[..., 3])
+    try:
+        return np.linalg.solve(AtA, Atb[..., np.newaxis])[..., 0]
+    except np.linalg.LinAlgError:
+        # Degenerate configuration, fallback to batched SVD
+        A = rows.transpose(1, 0, 2, 3).reshape(rows.shape[1], -1, 4)
+        U, S, Vt = np.linalg.svd(A)
+        X = Vt[:, -1]
+        return X[:, :3] / X[:, 3:]
+
+
+def refine_landmarks(Ps, lms, present, X, iterations=2):
+    """
+    Refine triangulated landmarks minimizing the reprojection error with Gauss-Newton iterations,
+    DLT solution minimizes just an algebraic error, so it is a good initial guess
+
+    Parameters:
+        Ps (np.array): (N, 3, 4) projection matrices of the povs.
+        lms (np.array): (N, L, 2) undistorted pixel coords of the landmarks on each pov.
+        present (np.array): (N, L) mask of the landmarks present on each pov.
+        X (np.array): (L, 3) initial points.
+
+    Returns:
+        np.array: (L, 3) refined points.
+    """
+    mask = present[..., np.newaxis]
+    for _ in range(iterations):
+        # Project the points onto every pov, shaped (N, L, 3)
+        p = np.einsum("nij,lj->nli", Ps[:, :, :3], X) + Ps[:, np.newaxis, :, 3]
+        proj = p[..., :2] / p[..., 2:]
+
+        # Residuals and the jacobian of the projection, shaped (N, L, 2) and (N, L, 2, 3)
+        r = np.where(mask, proj - lms, 0)
+        J = (
+            Ps[:, np.newaxis, :2, :3]
+            - proj[..., np.newaxis] * Ps[:, np.newaxis, np.newaxis, 2, :3]
+        ) / p[..., 2, np.newaxis, np.newaxis]
+        J = np.where(mask[..., np.newaxis], J, 0)
+
+        # Solve 3x3 normal equations of all landmarks at once
+        JtJ = np.einsum("nlij,nlik->ljk", J, J)
+        Jtr = np.einsum("nlij,nli->lj", J, r)
+        try:
+            X = X - np.linalg.solve(JtJ, Jtr[..., np.newaxis])[..., 0]
+        except np.linalg.LinAlgError:
+            # Degenerate configuration, keep the current solution
+            break
+
+    return X
@@ -0,0 +1,91 @@
+import cv2
+import numpy as np
+
+
+def make_undistortion_map(intrinsic_mtx, dist_coeffs, size):
+    """
+    Map every pixel of a size[0] x size[1] frame to its undistorted pixel coordinates
+    Result is HxWx2
+    """
+    w, h = size
+    xs, ys = np.meshgrid(np.arange(w, dtype=np.float32), np.arange(h, dtype=np.float32))
+    pixels = np.stack((xs, ys), axis=-1).reshape(-1, 1, 2)
+    undistorted = cv2.undistortPoints(
+        pixels, intrinsic_mtx, dist_coeffs, P=intrinsic_mtx
+    )
+    return undistorted.reshape(h, w, 2)
+
+
+def iterative_undistort_pixels(pts, intrinsic_mtx, dist_coeffs, iterations=5):
+    """
+    Undistort Nx2 pixel coordinates inverting the (k1, k2, p1, p2, k3) distortion model
+    with fixed point iterations, the same way cv2.undistortPoints does by default
+    (normalizing with fx, cx only and applying skew just when projecting back)
+    """
+    dist_coeffs = np.ravel(dist_coeffs)
+    if len(dist_coeffs) > 5:
+        raise ValueError("Only (k1, k2, p1, p2, k3) distortion model is supported.")
+    k1, k2, p1, p2, k3 = np.pad(dist_coeffs, (0, 5 - len(dist_coeffs)))
+    fx, skew, cx = intrinsic_mtx[0]
+    fy, cy = intrinsic_mtx[1, 1], intrinsic_mtx[1, 2]
+
+    # Distorted normalized coords
+    x0 = (pts[:, 0] - cx) / fx
+    y0 = (pts[:, 1] - cy) / fy
+
+    x, y = x0, y0
+    diverged = np.zeros(len(pts), dtype=bool)
+    for _ in range(iterations):
+        r2 = x * x + y * y
+        icdist = 1 / (1 + ((k3 * r2 + k2) * r2 + k1) * r2)
+        dx = 2 * p1 * x * y + p2 * (r2 + 2 * x * x)
+        dy = p1 * (r2 + 2 * y * y) + 2 * p2 * x * y
+
+        # Like OpenCV, give up on the points where the model folds over
+        diverged |= icdist < 0
+        x = np.where(diverged, x0, (x0 - dx) * icdist)
+        y = np.where(diverged, y0, (y0 - dy) * icdist)
+
+    # Back to pixel coords
+    return np.stack((fx * x + skew * y + cx, fy * y + cy), axis=-1).astype(np.float32)
+
+
+def undistort_pixels(undistortion_map, pts, intrinsic_mtx, dist_coeffs):
+    """
+    Undistort Nx2 pixel coordinates by bilinear sampling of the undistortion map
+    Points outside of the map are undistorted directly
+    """
+    h, w, _ = undistortion_map.shape
+    x, y = pts[:, 0], pts[:, 1]
+    inside = (x >= 0) & (y >= 0) & (x <= w - 1) & (y <= h - 1)
+
+    res = np.empty(pts.shape, dtype=np.float32)
+
+    # Bilinear sampling
+    xi, yi = x[inside], y[inside]
+    x0 = np.minimum(xi.astype(int), w - 2)
+    y0 = np.minimum(yi.astype(int), h - 2)
+    fx = (xi - x0)[:, np.newaxis]
+    fy = (yi - y0)[:, np.newaxis]
+    top = undistortion_map[y0, x0] * (1 - fx) + undistortion_map[y0, x0 + 1] * fx
+    bottom = (
+        undistortion_map[y0 + 1, x0] * (1 - fx) + undistortion_map[y0 + 1, x0 + 1] * fx
+    )
+    res[inside] = top * (1 - fy) + bottom * fy
+
+    # Fallback for the points outside of the frame,
+    # OpenCV handles the distortion models that iterative_undistort_pixels doesn't
+    if not inside.all():
+        if np.size(dist_coeffs) <= 5:
+            res[~inside] = iterative_undistort_pixels(
+                pts[~inside], intrinsic_mtx, dist_coeffs
+            )
+        else:
+            res[~inside] = cv2.undistortPoints(
+                pts[~inside].reshape(-1, 1, 2).astype(np.float32),
+                intrinsic_mtx,
+                dist_coeffs,
+                P=intrinsic_mtx,
+            ).reshape(-1, 2)
+
+    return res
@@ -4,6 +4,11 @@ T = TypeVar("T")
 
 
 class Wrapped(Generic[T]):
+    """
+    Latest value holder for a single producer and any consumers
+    NOTE: intentionally lock-free, a reference assignment is atomic under the GIL
+    """
+
     def __init__(self):
         self.data = None
 